@@ -660,6 +660,14 @@ def initialize_netcdf(pgen, cmask, filepath, filename, description, gisinfo):
     ncf.createDimension('lat', lat_shape)
     ncf.createDimension('lon', lon_shape)
 
+    # chunking and compression of output variables
+    chunks = pgen.get('netcdf_chunksizes')
+    if chunks:
+        chunks = dict(chunks)
+        chunks['lat'] = min(chunks['lat'], lat_shape)
+        chunks['lon'] = min(chunks['lon'], lon_shape)
+    compression = pgen.get('netcdf_compression', {})
+
     date = ncf.createVariable('time', 'f8', ('time',))
     date.units = 'days since 0001-01-01 00:00:00.0'
     date.calendar = 'standard'
@@ -689,8 +697,14 @@ def initialize_netcdf(pgen, cmask, filepath, filename, description, gisinfo):
         else:
             var_dim = ('time','lat', 'lon')
 
+        if chunks:
+            dims = (var_dim,) if isinstance(var_dim, str) else var_dim
+            chunksizes = [chunks[dim] for dim in dims]
+        else:
+            chunksizes = None
+
         variable = ncf.createVariable(
-                var_name, 'f4', var_dim)
+                var_name, 'f4', var_dim, chunksizes=chunksizes, **compression)
 
         variable.units = var_unit
 
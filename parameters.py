@@ -4,10 +4,74 @@
 PARAMETERS
 @author: slauniai & khaahti
 """
-import pathlib
+import os
 import time
 
 
+# output variables (rows can be commented away if not all variables are of interest)
+_VARIABLES = (
+    ('parameters_lai_conif', 'leaf area index of conifers [m2 m-2]'),
+    ('parameters_lai_decid_max', 'leaf area index of decidious trees [m2 m-2]'),
+    ('parameters_lai_shrub', 'leaf area index of shrubs [m2 m-2]'),
+    ('parameters_lai_grass', 'leaf area index of grass [m2 m-2]'),
+    ('parameters_hc', 'canopy height [m]'),
+    ('parameters_cf', 'canopy closure [-]'),
+    ('parameters_soilclass', 'soil class index'),
+    ('parameters_elevation', 'elevation from dem [m]'),
+    ('parameters_lat', 'latitude [deg]'),
+    ('parameters_lon', 'longitude [deg]'),
+    ('parameters_ditches', 'ditches'),
+    ('parameters_cmask', 'cmask'),
+    ('parameters_sitetype', 'sitetype'),
+    ('parameters_twi', 'twi'),
+    ('forcing_air_temperature', 'air temperature [degC]'),
+    ('forcing_precipitation', 'precipitation [mm d-1]'),
+    ('forcing_vapor_pressure_deficit', 'vapor pressure deficit [kPa]'),
+    ('forcing_global_radiation', 'global radiation [Wm-2]'),
+    ('forcing_wind_speed','wind speed [m s-1]'),
+    #('bucket_pond_storage', 'pond storage [m]'),
+    ('bucket_moisture_top', 'volumetric water content of moss layer [m3 m-3]'),
+    ('bucket_moisture_root', 'volumetric water content of rootzone [m3 m-3]'),
+    ('bucket_potential_infiltration', 'potential infiltration [mm d-1]'),
+    ('bucket_surface_runoff', 'surface runoff [mm d-1]'),
+    ('bucket_evaporation', 'evaporation from soil surface [mm d-1]'),
+    ('bucket_drainage', 'drainage from root layer [mm d-1]'),
+    ('bucket_water_storage', 'bucket water storage (top and root) [mm d-1]'),
+    ('bucket_storage_change', 'bucket water storage change (top and root) [mm d-1]'),
+    ('bucket_water_closure', 'bucket water balance error [mm d-1]'),
+    ('bucket_return_flow', 'return flow from deepzone to bucket [mm d-1]'),
+    ('soil_water_storage', 'soil water storage (deeplayer) [m]'),
+    ('soil_ground_water_level', 'ground water level [m]'),
+    ('soil_lateral_netflow', 'subsurface lateral netflow [mm d-1]'),
+    ('soil_netflow_to_ditch', 'netflow to ditch [mm d-1]'),
+    ('soil_moisture_deep', 'volumetric water content of deepzone [m3 m-3]'),
+    ('soil_water_closure', 'soil water balance error [mm d-1]'),
+    ('soil_transpiration_limitation', 'transpiration limitation [-]'),
+    #('canopy_interception', 'canopy interception [mm d-1]'),
+    ('canopy_evaporation', 'evaporation from interception storage [mm d-1]'),
+    ('canopy_transpiration','transpiration [mm d-1]'),
+    #('canopy_stomatal_conductance','stomatal conductance [m s-1]'),
+    #('canopy_throughfall', 'throughfall to moss or snow [mm d-1]'),
+    ('canopy_snow_water_equivalent', 'snow water equivalent [mm]'),
+    ('canopy_water_closure', 'canopy water balance error [mm d-1]'),
+    #('canopy_phenostate', 'canopy phenological state [-]'),
+    #('canopy_leaf_area_index', 'canopy leaf area index [m2 m-2]'),
+    #('canopy_degree_day_sum', 'sum of degree days [degC]'),
+    #('canopy_fLAI', 'state of LAI'),
+    ('canopy_water_storage', 'canopy intercepted water storage'),
+    ('canopy_snowfall', 'canopy snowfall'),
+    ('top_baseflow', 'topmodel baseflow [mm d-1]'),
+    ('top_water_closure', 'topmodel water balance error [mm d-1]'),
+    ('top_returnflow', 'topmodel returnflow [mm d-1]'),
+    ('top_local_returnflow', 'topmodel local returnflow [mm d-1]'),
+    ('top_drainage_in', 'topmodel inflow from drainage [mm d-1]'),
+    ('top_saturation_deficit', 'topmodel saturation deficit [m]'),
+    ('top_local_saturation_deficit', 'topmodel local saturation deficit [mm]'),
+    ('top_saturated_area', 'topmodel saturated area [-]'),
+    ('top_storage_change', 'topmodel_water_storage_change [mm d-1]'),
+)
+
+
 def parameters(folder=''):
 
     pgen = {'description': 'testcase',  # description written in result file
@@ -23,74 +87,15 @@ def parameters(folder=''):
             # else needs soil_id.dat, ditch_depth.dat, ditch_spacing.dat
             'spatial_forcing': False,  # if False uses forcing from forcing file with pgen['forcing_id'] and cpy['loc']
             # else needs Ncoord.dat, Ecoord.dat, forcing_id.dat
-            'gis_folder': str(pathlib.Path(folder+r'/parameters')),
-            'forcing_file': str(pathlib.Path(folder+r'/forcing/Kenttarova_forcing_era5.csv')),
+            'gis_folder': os.path.join(folder, 'parameters'),
+            'forcing_file': os.path.join(folder, 'forcing', 'Kenttarova_forcing_era5.csv'),
             'forcing_id': 0,  # used if spatial_forcing == False
             'ncf_file': folder + '_' + time.strftime('%Y%m%d%H%M') + r'.nc',  # added timestamp to result file name to avoid saving problem when running repeatedly
             'results_folder': r'D:\SpaFHy_2D_2021/',
             'save_interval': 366, # interval for writing results to file (decreases need for memory during computation)
-            'variables':[ # list of output variables (rows can be commented away if not all variables are of interest)
-                    ['parameters_lai_conif', 'leaf area index of conifers [m2 m-2]'],
-                    ['parameters_lai_decid_max', 'leaf area index of decidious trees [m2 m-2]'],
-                    ['parameters_lai_shrub', 'leaf area index of shrubs [m2 m-2]'],
-                    ['parameters_lai_grass', 'leaf area index of grass [m2 m-2]'],
-                    ['parameters_hc', 'canopy height [m]'],
-                    ['parameters_cf', 'canopy closure [-]'],
-                    ['parameters_soilclass', 'soil class index'],
-                    ['parameters_elevation', 'elevation from dem [m]'],
-                    ['parameters_lat', 'latitude [deg]'],
-                    ['parameters_lon', 'longitude [deg]'],
-                    ['parameters_ditches', 'ditches'],
-                    ['parameters_cmask', 'cmask'],
-                    ['parameters_sitetype', 'sitetype'],
-                    ['parameters_twi', 'twi'],
-                    ['forcing_air_temperature', 'air temperature [degC]'],
-                    ['forcing_precipitation', 'precipitation [mm d-1]'],
-                    ['forcing_vapor_pressure_deficit', 'vapor pressure deficit [kPa]'],
-                    ['forcing_global_radiation', 'global radiation [Wm-2]'],
-                    ['forcing_wind_speed','wind speed [m s-1]'],
-                    #['bucket_pond_storage', 'pond storage [m]'],
-                    ['bucket_moisture_top', 'volumetric water content of moss layer [m3 m-3]'],
-                    ['bucket_moisture_root', 'volumetric water content of rootzone [m3 m-3]'],
-                    ['bucket_potential_infiltration', 'potential infiltration [mm d-1]'],
-                    ['bucket_surface_runoff', 'surface runoff [mm d-1]'],
-                    ['bucket_evaporation', 'evaporation from soil surface [mm d-1]'],
-                    ['bucket_drainage', 'drainage from root layer [mm d-1]'],
-                    ['bucket_water_storage', 'bucket water storage (top and root) [mm d-1]'],
-                    ['bucket_storage_change', 'bucket water storage change (top and root) [mm d-1]'],
-                    ['bucket_water_closure', 'bucket water balance error [mm d-1]'],
-                    ['bucket_return_flow', 'return flow from deepzone to bucket [mm d-1]'],
-                    ['soil_water_storage', 'soil water storage (deeplayer) [m]'],
-                    ['soil_ground_water_level', 'ground water level [m]'],
-                    ['soil_lateral_netflow', 'subsurface lateral netflow [mm d-1]'],
-                    ['soil_netflow_to_ditch', 'netflow to ditch [mm d-1]'],
-                    ['soil_moisture_deep', 'volumetric water content of deepzone [m3 m-3]'],
-                    ['soil_water_closure', 'soil water balance error [mm d-1]'],
-                    ['soil_transpiration_limitation', 'transpiration limitation [-]'],
-                    #['canopy_interception', 'canopy interception [mm d-1]'],
-                    ['canopy_evaporation', 'evaporation from interception storage [mm d-1]'],
-                    ['canopy_transpiration','transpiration [mm d-1]'],
-                    #['canopy_stomatal_conductance','stomatal conductance [m s-1]'],
-                    #['canopy_throughfall', 'throughfall to moss or snow [mm d-1]'],
-                    ['canopy_snow_water_equivalent', 'snow water equivalent [mm]'],
-                    ['canopy_water_closure', 'canopy water balance error [mm d-1]'],
-                    #['canopy_phenostate', 'canopy phenological state [-]'],
-                    #['canopy_leaf_area_index', 'canopy leaf area index [m2 m-2]'],
-                    #['canopy_degree_day_sum', 'sum of degree days [degC]'],
-                    #['canopy_fLAI', 'state of LAI'],
-                    ['canopy_water_storage', 'canopy intercepted water storage'],
-                    ['canopy_snowfall', 'canopy snowfall'],
-                    ['top_baseflow', 'topmodel baseflow [mm d-1]'],
-                    ['top_water_closure', 'topmodel water balance error [mm d-1]'],
-                    ['top_returnflow', 'topmodel returnflow [mm d-1]'],
-                    ['top_local_returnflow', 'topmodel local returnflow [mm d-1]'],
-                    ['top_drainage_in', 'topmodel inflow from drainage [mm d-1]'],
-                    ['top_saturation_deficit', 'topmodel saturation deficit [m]'],
-                    ['top_local_saturation_deficit', 'topmodel local saturation deficit [mm]'],
-                    ['top_saturated_area', 'topmodel saturated area [-]'],
-                    ['top_storage_change', 'topmodel_water_storage_change [mm d-1]']
-
-                    ]
+            'netcdf_chunksizes': {'time': 366, 'lat': 64, 'lon': 64},  # chunks of output variables, time-series reads of a cell touch few chunks
+            'netcdf_compression': {'zlib': True, 'complevel': 4, 'shuffle': True},  # compression of output variables
+            'variables': _VARIABLES,  # output variables
              }
 
     f=1.0
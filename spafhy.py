@@ -139,7 +139,7 @@ class SpaFHy():
 
         elif self.simtype == 'TOP':
             # run Topmodel water balance
-            RR = self.bu._drainage_to_gw * self.top.CellArea / self.top.CatchmentArea
+            RR = self.bu._drainage_to_gw * self.top.area_ratio
             #bu_airv = self.bu.Wair_root
 
             top_results = self.top.run_timestep(R=RR)
@@ -155,7 +155,7 @@ class SpaFHy():
                 rr=1e-3*canopy_results['potential_infiltration'],
                 tr=1e-3*canopy_results['transpiration'],
                 evap=1e-3*canopy_results['forestfloor_evaporation'],
-                retflow=self.top.qr)
+                retflow=self.top.qr.copy())  # top.qr is updated in place each timestep
 
             return top_results, canopy_results, bucket_results
 
@@ -15,9 +15,90 @@ Modified by jpnousu
 ******************************************************************************
 """
 
+import math
 import numpy as np
 # import matplotlib.pyplot as plt
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
 eps = np.finfo(float).eps  # machine epsilon
+DEG2RAD = math.pi / 180.0
+
+
+def _top_step_py(dxi, So, Qb, R, cell_over_catch, qr, s):
+    """
+    one Topmodel timestep over catchment cells; updates qr and s in place.
+    Args:
+        dxi - local deviation of storage deficit from catchment average [m]
+        So - catchment average saturation deficit at start of timestep [m]
+        Qb - baseflow [m per unit area], see Topmodel_Homogenous.subsurfaceflow
+        R - recharge [m per unit catchment area]
+        cell_over_catch - ratio of cell area to catchment area [-]
+        qr - distributed returnflow [m], output
+        s - local saturation deficit after returnflow [m], output
+    Returns:
+        Qr - returnflow [m per unit area]
+        fsat - saturated area fraction [-]
+        S - catchment average saturation deficit at end of timestep [m]
+    """
+    S = So + Qb - R
+
+    qr_sum = 0.0
+    nsat = 0
+    for i in prange(dxi.size):
+        si = S + dxi[i]
+        q = -si if si < 0.0 else 0.0
+        qr[i] = q
+        s[i] = si + q
+        qr_sum += q
+        if si <= 0.0:
+            nsat += 1
+
+    Qr = qr_sum*cell_over_catch
+    return Qr, nsat*cell_over_catch, S + Qr
+
+
+def _compute_xi_py(a, slope, dx, out):
+    """
+    topographic wetness index xi = log(a / dx / (tan(slope) + eps)) over flattened grids
+    Args:
+        a - flow accumulation [m]
+        slope - local slope [deg]
+        dx - grid cell size [m]
+        out - xi [-], output
+    """
+    for i in prange(a.size):
+        out[i] = math.log(a[i] / dx / (math.tan(slope[i]*DEG2RAD) + eps))
+
+
+if njit is not None:
+    # ninf is left out of fastmath: xi is -inf where flow accumulation is zero
+    _top_step = njit(parallel=True, cache=True,
+                     fastmath={'nsz', 'arcp', 'contract', 'reassoc'})(_top_step_py)
+    _compute_xi = njit(parallel=True, cache=True)(_compute_xi_py)
+else:
+    def _compute_xi(a, slope, dx, out):
+        """numpy fallback of _compute_xi_py when numba is not available"""
+        buf = np.empty_like(slope)
+        np.multiply(slope, DEG2RAD, out=buf)  # deg to rad
+        np.tan(buf, out=buf)
+        np.add(buf, eps, out=buf)
+        np.divide(a, dx, out=out)
+        np.divide(out, buf, out=out)
+        np.log(out, out=out)
+
+    def _top_step(dxi, So, Qb, R, cell_over_catch, qr, s):
+        """numpy fallback of _top_step_py when numba is not available"""
+        S = So + Qb - R
+        np.add(dxi, S, out=s)
+        np.maximum(-s, 0.0, out=qr)
+        Qr = np.sum(qr, dtype=np.float64)*cell_over_catch
+        nsat = np.count_nonzero(s <= 0)
+        s += qr
+        return Qr, nsat*cell_over_catch, S + Qr
+
 
 class Topmodel_Homogenous():
     def __init__(self, pp, S_initial=None):
@@ -50,39 +131,68 @@ class Topmodel_Homogenous():
         dxy = pp['dxy']
 
         self.CellArea = dxy**2
-        dx = self.CellArea**0.5
-        self.CatchmentArea = np.size(cmask[cmask == 1])*self.CellArea
-        self.qr = np.full_like(cmask, 0.0)
+        dx = dxy
+        incatch = (cmask == 1)  # catchment cells
+        self.CatchmentArea = np.count_nonzero(incatch)*self.CellArea
+        self.area_ratio = self.CellArea / self.CatchmentArea  # cell area / catchment area
 
-        # topography
-        self.a = flowacc*cmask  # flow accumulation grid
-        self.slope = slope*cmask  # slope (deg) grid
+        # topography; grids are kept in single precision, nan outside catchment
+        self.a = np.where(incatch, flowacc, np.nan).astype(np.float32)  # flow accumulation grid
+        self.slope = np.where(incatch, slope, np.nan).astype(np.float32)  # slope (deg) grid
 
         # effective soil depth [m]
         self.M = pp['m']
+        self._neg_inv_M = -1.0 / (self.M + eps)
         # lat. hydr. conductivity at surface [m2/timestep]
         # self.To = pp['ko']*pp['m']*self.dt
         self.To = pp['ko']*self.dt
 
-        """
-        local and catchment average hydrologic similarity indices (xi, X).
-        Set xi > twi_cutoff equal to cutoff value to remove tail of twi-distribution.
-        This concerns mainly the stream network cells. 'Outliers' in twi-distribution are
-        problem for streamflow prediction
-        """
-        slope_rad = np.radians(self.slope)  # deg to rad
+        # local and catchment average hydrologic similarity indices (xi, X).
+        # Set xi > twi_cutoff equal to cutoff value to remove tail of twi-distribution.
+        # This concerns mainly the stream network cells. 'Outliers' in twi-distribution are
+        # problem for streamflow prediction
+
+        # kernel works on flat views, so all grids must be C-contiguous
+        xi = np.empty(self.a.shape, dtype=np.float32)
+        _compute_xi(np.ascontiguousarray(self.a).ravel(),
+                    np.ascontiguousarray(self.slope).ravel(), dx, xi.ravel())
 
-        xi = np.log(self.a / dx / (np.tan(slope_rad) + eps))
-        clim = np.percentile(xi[xi > 0], pp['twi_cutoff'])
+        # 'twi_cutoff' percentile of positive xi, interpolated between the two
+        # neighbouring order statistics as in np.percentile
+        pos_xi = xi[xi > 0]
+        p = pp['twi_cutoff'] / 100.0 * (pos_xi.size - 1)
+        k = int(p)
+        t = p - k
+        if k + 1 < pos_xi.size:
+            pos_xi = np.partition(pos_xi, [k, k + 1])
+            lo, hi = float(pos_xi[k]), float(pos_xi[k + 1])
+            if t < 0.5:
+                clim = lo + (hi - lo)*t
+            else:
+                clim = hi - (hi - lo)*(1.0 - t)
+        else:
+            clim = float(np.max(pos_xi))
+        del pos_xi
 
         # cuts the tail but assigns the exceeding values to the 'twi_cutoff' quantile
-        xi[xi > clim] = clim
+        np.minimum(xi, clim, out=xi)
         # second way to cut the tail and assign the exceeded values into distribution median
         #xi[xi > clim] = np.nanmedian(xi)
 
-        self.xi = xi
+        # Topmodel has no lateral coupling between cells: state is kept as
+        # contiguous 1D arrays of catchment cells, grids are rebuilt for output
+        self._shape = xi.shape
+        self._idx = np.flatnonzero(incatch & ~np.isnan(xi))
+        self.xi = xi.ravel()[self._idx]
 
-        self.X = 1.0 / self.CatchmentArea*np.nansum(self.xi*self.CellArea)
+        # distributed returnflow, compact and as grid [m]
+        self._qr = np.zeros_like(self.xi)
+        self.qr = self._to_grid(self._qr)
+
+        self.X = 1.0 / self.CatchmentArea*np.sum(self.xi*self.CellArea, dtype=np.float64)
+
+        # local deviation of storage deficit from catchment average is constant in time
+        self._dxi = (self.M*(self.X - self.xi)).astype(np.float32)
 
         # baseflow rate when catchment Smean=0.0
         self.Qo = self.To*np.exp(-self.X)
@@ -90,20 +200,40 @@ class Topmodel_Homogenous():
         # catchment average saturation deficit S [m] is the only state variable
         s = self.local_s(S_initial)
         s[s < 0] = 0.0
-        self.S = np.nanmean(s)
+        self.S = np.mean(s, dtype=np.float64)
+
+        # results of run_timestep
+        self._results = {
+                'baseflow': 0.0,
+                'returnflow': 0.0,
+                'local_returnflow': None,
+                'drainage_in': 0.0,
+                'water_closure': 0.0,
+                'saturation_deficit': self.S,
+                'local_saturation_deficit': None,
+                'saturated_area': 0.0,
+                'storage_change': 0.0
+                }
 
 
     def local_s(self, Smean):
         """
-        computes local storage deficit s [m] from catchment average
+        computes local storage deficit s [m] from catchment average,
+        as 1D array of catchment cells (see _to_grid)
+        """
+        return Smean + self._dxi
+
+    def _to_grid(self, x):
+        """
+        maps 1D array of catchment cells to grid, nan outside catchment
         """
-        s = Smean + self.M*(self.X - self.xi)
-        return s
+        grid = np.full(self._shape, np.nan, dtype=x.dtype)
+        grid.flat[self._idx] = x
+        return grid
 
     def subsurfaceflow(self):
         """subsurface flow to stream network (per unit catchment area)"""
-        Qb = self.Qo*np.exp(-self.S / (self.M + eps))
-        return Qb
+        return self.Qo*math.exp(self.S*self._neg_inv_M)
 
     def run_timestep(self, R):
         """
@@ -118,35 +248,20 @@ class Topmodel_Homogenous():
         Note:
             R is the mean drainage [m] from bucketgrid.
         """
-        #print(R)
         # initial conditions
         So = self.S
-        s = self.local_s(So)
 
         # subsurface flow, based on initial state
         Qb = self.subsurfaceflow()
 
-        # update storage deficit and check where we have returnflow
-        S = So + Qb - R
-        s = self.local_s(S)
-
-        # returnflow grid
-        self.qr = -s
-        self.qr[self.qr < 0] = 0.0  # returnflow grid, m
-
-        # average returnflow per unit area
-        Qr = np.nansum(self.qr)*self.CellArea / self.CatchmentArea
-
-        # now all saturation excess is in Qr so update s and S.
-        # Deficit increases when Qr is removed
-        S = S + Qr
-        self.S = S
-        s = s + self.qr
-        # saturated area fraction
-        ix = np.where(s <= 0)
-
-        fsat = len(ix[0])*self.CellArea / self.CatchmentArea
-        del ix
+        # storage deficit update, returnflow grid and saturated area in a
+        # single pass over the grid.
+        # All saturation excess is in Qr, so deficit increases when Qr is removed
+        s = np.empty_like(self._dxi)
+        Qr, fsat, self.S = _top_step(
+                self._dxi, So, Qb, R, self.area_ratio, self._qr, s)
+        # qr grid is updated in place; callers keeping it must copy
+        self.qr.flat[self._idx] = self._qr
 
         # check mass balance
         dS = (So - self.S)
@@ -154,16 +269,16 @@ class Topmodel_Homogenous():
         mbe = dS - dF
 
 
-        results = {
-                'baseflow': Qb * 1e3,  # [mm d-1]
-                'returnflow': Qr * 1e3, #[mm d-1]
-                'local_returnflow': self.qr * 1e3, # [mm]
-                'drainage_in': R * 1e3, #[mm d-1]
-                'water_closure': mbe * 1e3, #
-                'saturation_deficit': self.S, # [m]
-                'local_saturation_deficit': s * 1e3, # [mm]
-                'saturated_area': fsat, #[-],
-                'storage_change': dF *1e3 # [mm d-1]
-                }
+        # results dict is reused between timesteps; caller copies the values
+        results = self._results
+        results['baseflow'] = Qb * 1e3  # [mm d-1]
+        results['returnflow'] = Qr * 1e3  # [mm d-1]
+        results['local_returnflow'] = self.qr * 1e3  # [mm]
+        results['drainage_in'] = R * 1e3  # [mm d-1]
+        results['water_closure'] = mbe * 1e3  #
+        results['saturation_deficit'] = self.S  # [m]
+        results['local_saturation_deficit'] = self._to_grid(s * 1e3)  # [mm]
+        results['saturated_area'] = fsat  # [-]
+        results['storage_change'] = dF * 1e3  # [mm d-1]
 
         return results